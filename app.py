@@ -1,105 +1,96 @@
 # app.py — Log ingestion + IOC analysis + AI insights stored in risk records
+import io
 import os
-import re
-import uuid
-import importlib.util
+import asyncio
+import secrets
+import threading
+import time
 import sys
-from typing import Dict, Any
+import hmac
 
-# --- Load Helpers Dynamically ---
-def load_module_from_path(name: str, path: str):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    sys.modules[name] = module
-    spec.loader.exec_module(module)
-    return module
-
-BASE_DIR = os.path.dirname(__file__)
-HELPERS_PATH = os.path.join(BASE_DIR, "src", "grc_risk_dashboard", "helpers.py")
-AI_HELPER_PATH = os.path.join(BASE_DIR, "src", "ai_helper.py")
-
-helpers = load_module_from_path("helpers", HELPERS_PATH)
-ai_helper = load_module_from_path("ai_helper", AI_HELPER_PATH)
-
-load_df = helpers.load_df
-save_record = helpers.save_record
-score_risk = helpers.score_risk
-build_matrix = helpers.build_matrix
-from src.ai_helper import predict_attack_and_mitigation
-
-# --- Streamlit + Core Imports ---
 import streamlit as st
-import pandas as pd
-import requests
-import plotly.graph_objects as go
+import bcrypt
 
 st.set_page_config(page_title="🛡️ GRC Risk Dashboard", layout="wide")
 
 # ----------------------------
 # 🧩 Authentication
 # ----------------------------
-VALID_USERNAME = "admin"
-VALID_PASSWORD = "secure120"
+def read_secret(name: str, default=""):
+    """
+    A value from Streamlit secrets, or default when it is unset.
+    With no secrets.toml at all st.secrets raises StreamlitSecretNotFoundError (a FileNotFoundError) instead.
+    """
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        return default
+
+# Credentials live in Streamlit secrets: the admin username and a bcrypt hash of the password.
+ADMIN_USER = read_secret("admin_user")
+ADMIN_BCRYPT = read_secret("admin_bcrypt")
+
+def check_credentials(username: str, password: str) -> bool:
+    """Constant-time username compare plus bcrypt password check; both always run so timing reveals neither."""
+    user_ok = hmac.compare_digest(username.encode(), ADMIN_USER.encode())
+    password_ok = bcrypt.checkpw(password.encode(), ADMIN_BCRYPT.encode())
+    return user_ok and password_ok
+
+LOGIN_NOT_CONFIGURED = "Login is not configured. Set admin_user and admin_bcrypt in Streamlit secrets."
+
+# Built once at import; the page only references it.
+LOGIN_CSS = """
+<style>
+.block-container {
+    max-width: 700px;
+    margin: auto;
+    padding-top: 5rem;
+}
+.login-box {
+    background-color: #11141B;
+    padding: 2.2rem;
+    border-radius: 15px;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.25);
+    border: 1px solid rgba(255,255,255,0.1);
+}
+.login-title {
+    text-align:center;
+    color:#E4E8F0;
+    font-size:1.8rem;
+    font-weight:700;
+    margin-bottom:1rem;
+}
+</style>
+"""
 
 if "authenticated" not in st.session_state:
     st.session_state.authenticated = False
 
 if not st.session_state.authenticated:
-    st.markdown(
-        """
-        <style>
-        .block-container {
-            max-width: 700px;
-            margin: auto;
-            padding-top: 5rem;
-        }
-        .login-box {
-            background-color: #11141B;
-            padding: 2.2rem;
-            border-radius: 15px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.25);
-            border: 1px solid rgba(255,255,255,0.1);
-        }
-        .login-title {
-            text-align:center;
-            color:#E4E8F0;
-            font-size:1.8rem;
-            font-weight:700;
-            margin-bottom:1rem;
-        }
-        .demo-box {
-            background-color: #1E2B3A;
-            color:#B9C8D8;
-            border-left:4px solid #2F80ED;
-            padding:1rem;
-            border-radius:8px;
-            margin-bottom:1rem;
-            font-size:0.95rem;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
+    # The style has to be re-emitted on every login rerun: Streamlit drops elements a rerun does not produce.
+    st.markdown(LOGIN_CSS, unsafe_allow_html=True)
 
     st.markdown("<div class='login-box'>", unsafe_allow_html=True)
     st.markdown("<div class='login-title'>🔐 GRC Dashboard Login</div>", unsafe_allow_html=True)
 
-    st.markdown(
-        """
-        <div class='demo-box'>
-            👤 <b>Demo Credentials</b><br>
-            Username: <b>admin</b><br>
-            Password: <b>secure120</b>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-    username = st.text_input("Username", placeholder="Enter your username")
-    password = st.text_input("Password", placeholder="Enter your password", type="password")
-
-    if st.button("Login"):
-        if username == VALID_USERNAME and password == VALID_PASSWORD:
+    if not (ADMIN_USER and ADMIN_BCRYPT):
+        st.error(LOGIN_NOT_CONFIGURED)
+        st.stop()
+
+    # A form sends both fields in one submit, so typing does not rerun the script.
+    with st.form("login"):
+        username = st.text_input("Username", placeholder="Enter your username")
+        password = st.text_input("Password", placeholder="Enter your password", type="password")
+        submitted = st.form_submit_button("Login")
+
+    if submitted:
+        try:
+            ok = check_credentials(username, password)
+        except ValueError:
+            # bcrypt rejects an admin_bcrypt that is not a valid hash ("Invalid salt").
+            st.error(LOGIN_NOT_CONFIGURED)
+            st.stop()
+        if ok:
             st.session_state.authenticated = True
             st.success("✅ Login successful! Loading dashboard...")
             st.rerun()
@@ -107,6 +98,40 @@ if not st.session_state.authenticated:
             st.error("❌ Invalid username or password.")
     st.stop()
 
+# --- Deferred Imports ---
+# The login page only needs Streamlit; pandas, numpy, plotly, the AI client and the scanners load once signed in.
+import pandas as pd
+import numpy as np
+import aiohttp
+from cachetools import TTLCache
+import plotly.graph_objects as go
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+
+# orjson parses the many small AbuseIPDB responses faster than the stdlib decoder.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# --- Load Helpers ---
+# Plain imports are served from sys.modules on every Streamlit rerun after the first.
+BASE_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.join(BASE_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from grc_risk_dashboard import helpers
+from grc_risk_dashboard.iocs import extract_iocs
+from ai_helper import predict_batch
+
+load_df = helpers.load_df
+save_records = helpers.save_records
+score_risk = helpers.score_risk
+build_matrix = helpers.build_matrix
+risks_version = helpers.data_version
+CELL_LABELS = helpers.CELL_LABELS
+
 # ----------------------------
 # 🧠 Dashboard Main Area
 # ----------------------------
@@ -121,50 +146,134 @@ st.sidebar.info("Upload logs to auto-detect risks. Add ABUSEIPDB key in Secrets
 # -----------------------
 # Helper Functions
 # -----------------------
-def extract_iocs(text: str) -> Dict[str, list]:
-    """Extract common IOCs from text."""
-    import re
-    ips = re.findall(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b', text)
-    urls = re.findall(r'(https?://[^\s,;]+)', text)
-    hashes = re.findall(r'\b[a-fA-F0-9]{32,64}\b', text)
-    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b', text)
-    domains = [re.split(r'https?://', u)[-1].split('/')[0] for u in urls if "://" in u]
-    return {
-        "IPs": sorted(set(ips)),
-        "URLs": sorted(set(urls)),
-        "Domains": sorted(set(domains)),
-        "Hashes": sorted(set(hashes)),
-        "Emails": sorted(set(emails))
-    }
+ABUSEIPDB_URL = "https://api.abuseipdb.com/api/v2/check"
+ABUSEIPDB_CONCURRENCY = 16
 
-def check_abuseipdb(ip: str, api_key: str):
+async def check_abuseipdb(session: aiohttp.ClientSession, sem: asyncio.Semaphore, ip: str, api_key: str):
     """Query AbuseIPDB for IP reputation."""
     if not api_key:
         return {"ip": ip, "error": "no_api_key"}
     try:
-        r = requests.get(
-            "https://api.abuseipdb.com/api/v2/check",
-            headers={"Key": api_key, "Accept": "application/json"},
-            params={"ipAddress": ip, "maxAgeInDays": 90},
-            timeout=10,
-        )
-        if r.status_code == 200:
-            data = r.json().get("data", {})
-            return {"ip": ip, "abuseConfidenceScore": int(data.get("abuseConfidenceScore", 0))}
-        return {"ip": ip, "error": f"HTTP {r.status_code}"}
+        async with sem:
+            for attempt in range(2):
+                async with session.get(
+                    ABUSEIPDB_URL,
+                    params={"ipAddress": ip, "maxAgeInDays": 90},
+                    timeout=aiohttp.ClientTimeout(total=10),
+                ) as r:
+                    # Back off once when AbuseIPDB tells us how long to wait.
+                    retry_after = r.headers.get("Retry-After", "")
+                    if r.status == 429 and attempt == 0 and retry_after.isdigit():
+                        await asyncio.sleep(min(int(retry_after), 10))
+                        continue
+                    if r.status == 200:
+                        data = json_loads(await r.read()).get("data", {})
+                        return {"ip": ip, "abuseConfidenceScore": int(data.get("abuseConfidenceScore", 0))}
+                    return {"ip": ip, "error": f"HTTP {r.status}"}
     except Exception as e:
         return {"ip": ip, "error": str(e)}
 
-def map_score_to_li_impact(score: int):
-    """Convert abuse score to likelihood and impact."""
-    if score >= 80: return 5, 5
-    elif score >= 60: return 4, 4
-    elif score >= 40: return 3, 3
-    elif score >= 20: return 2, 2
-    else: return 1, 1
+@st.cache_resource(show_spinner=False)
+def abuseipdb_cache():
+    """Successful AbuseIPDB lookups, shared across reruns and sessions for a day."""
+    return TTLCache(maxsize=25000, ttl=24 * 3600), threading.Lock()
+
+async def check_abuseipdb_all(ips: list, api_key: str, on_progress=None) -> list:
+    """Check all IPs concurrently, serving repeats from the cache and reporting completions through on_progress."""
+    # Report roughly every 5% so large scans don't flood the frontend with progress messages.
+    step = max(1, len(ips) // 20)
+    cache, lock = abuseipdb_cache()
+    with lock:
+        results = {ip: cache[ip] for ip in ips if cache.get(ip) is not None}
+    if on_progress and results:
+        on_progress(len(results))
+    sem = asyncio.Semaphore(ABUSEIPDB_CONCURRENCY)
+    # One keep-alive connection per concurrent slot: the TLS handshake is paid once per slot, not per IP.
+    connector = aiohttp.TCPConnector(limit_per_host=ABUSEIPDB_CONCURRENCY, ttl_dns_cache=300)
+    headers = {"Key": api_key, "Accept": "application/json"}
+    async with aiohttp.ClientSession(connector=connector, headers=headers) as session:
+        tasks = [check_abuseipdb(session, sem, ip, api_key) for ip in ips if ip not in results]
+        for done, task in enumerate(asyncio.as_completed(tasks), len(results) + 1):
+            res = await task
+            results[res["ip"]] = res
+            if "abuseConfidenceScore" in res:
+                with lock:
+                    cache[res["ip"]] = res
+            if on_progress and (done % step == 0 or done == len(ips)):
+                on_progress(done)
+    return [results[ip] for ip in ips]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_load_df(version: tuple) -> pd.DataFrame:
+    """Saved risks with Arrow-backed dtypes, re-read only when the risk store changes."""
+    # Arrow-backed dtypes serialize to the frontend far more cheaply than object columns.
+    return load_df().convert_dtypes(dtype_backend="pyarrow")
+
+def session_risks(version: tuple) -> pd.DataFrame:
+    """This session's copy of the saved risks, reloaded from the shared cache only when the store changed elsewhere."""
+    ss = st.session_state
+    if ss.get("risks_version") != version:
+        ss["risks_df"] = cached_load_df(version)
+        ss["risks_version"] = version
+    return ss["risks_df"]
+
+def remember_saved(records: list, stamps: tuple) -> None:
+    """Append just-saved records to the session copy so the next read skips re-parsing the whole store."""
+    ss = st.session_state
+    before, after = stamps
+    if after is None or ss.get("risks_version") != before:
+        return  # another write landed too, or the copy was already stale; session_risks reloads it
+    new_df = pd.DataFrame(records, columns=helpers.COLUMNS)
+    new_df["timestamp"] = pd.to_datetime(new_df["timestamp"], unit="ns")
+    new_df = new_df.convert_dtypes(dtype_backend="pyarrow")
+    old_df = ss["risks_df"]
+    ss["risks_df"] = new_df if old_df.empty else pd.concat([old_df, new_df], ignore_index=True)
+    ss["risks_version"] = after
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_csv_bytes(version: tuple, _df: pd.DataFrame) -> bytes:
+    """CSV export of the saved risks, serialised by Arrow's writer only when the risk store changes."""
+    buf = io.BytesIO()
+    pa_csv.write_csv(pa.Table.from_pandas(_df, preserve_index=False), buf)
+    return buf.getvalue()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_matrix(version: tuple, _df: pd.DataFrame) -> np.ndarray:
+    """Risk matrix for the saved risks, rebuilt only when the risk store changes."""
+    return build_matrix(_df)
+
+@st.cache_resource(show_spinner=False)
+def _build_heatmap_fig(matrix_tuple: tuple) -> go.Figure:
+    """Plotly risk-matrix figure, built once per distinct matrix (a tuple of row tuples, so it can be hashed)."""
+    fig = go.Figure(
+        data=go.Heatmap(
+            z=matrix_tuple,
+            x=[1, 2, 3, 4, 5],
+            y=[5, 4, 3, 2, 1],
+            colorscale=[[0.0, "#00C896"], [0.5, "#FFCE54"], [1.0, "#E74C3C"]],
+            hovertemplate="<b>Likelihood:</b> %{x}<br><b>Impact:</b> %{y}<br><b>Risks:</b> %{z}<extra></extra>",
+            showscale=True,
+            colorbar_title="Risk Level"
+        )
+    )
+    fig.update_layout(
+        paper_bgcolor="#0E1117",
+        plot_bgcolor="#0E1117",
+        width=600, height=500,
+        margin=dict(l=50, r=50, t=60, b=60),
+        title=dict(text="📊 Organizational Risk Matrix", font=dict(size=18, color="#E6E9F0"), x=0.5)
+    )
+    return fig
+
+SCORE_THRESHOLDS = np.array([20, 40, 60, 80])
+
+def map_scores_to_li_impact(scores: np.ndarray):
+    """Convert an array of abuse scores to likelihood and impact arrays."""
+    # side="right" puts a score equal to a threshold in the higher band (20 -> 2, 80 -> 5).
+    levels = np.searchsorted(SCORE_THRESHOLDS, scores, side="right") + 1
+    return levels, levels
 
-def create_risk_record(ioc_type, ioc_value, snippet, likelihood, impact):
-    rid = str(uuid.uuid4())
+def create_risk_record(rid, ioc_type, ioc_value, snippet, likelihood, impact, timestamp):
     risk_score = score_risk(likelihood, impact)
     return {
         "risk_id": rid,
@@ -173,23 +282,61 @@ def create_risk_record(ioc_type, ioc_value, snippet, likelihood, impact):
         "likelihood": likelihood,
         "impact": impact,
         "risk_score": risk_score,
+        "risk_cell": CELL_LABELS[(likelihood, impact)],
         "owner": "AutoDetector",
         "attack_type": "",
         "mitigation": "",
-        "timestamp": pd.Timestamp.now()
+        "timestamp": timestamp
     }
 
+def _persist(to_save, ip_score, first_pos, content):
+    """Enrich the selected IOCs with context, AI insights and likelihood/impact, and save them as risks; returns the saved records and the store stamps around the save."""
+    items = []
+    # A memoryview over the upload buffer: snippets are sliced without copying the whole file.
+    with content.getbuffer() as raw:
+        for ioc_type, ioc_value in to_save:
+            pos = first_pos.get(ioc_value, -1)
+            snippet = bytes(raw[max(0, pos - 120): pos + 120]).decode("utf-8", errors="ignore") if pos != -1 else f"Detected {ioc_type} {ioc_value}"
+            score = ip_score.get(ioc_value, 50) if ioc_type == "IPs" else 50
+            items.append((ioc_value, ioc_type, score, snippet))
+
+    # AI Insights: one batched request for every selected IOC
+    try:
+        batch = [(v, t, s // 10 * 10, c) for v, t, s, c in items]
+        # predict_batch caches each IOC for a day across sessions, so only IOCs it has not seen reach the model.
+        predictions = asyncio.run(predict_batch(batch))
+    except Exception as e:
+        st.sidebar.warning(f"AI unavailable: {e}")
+        predictions = [None] * len(items)
+
+    likelihoods, impacts = map_scores_to_li_impact(np.array([score for _, _, score, _ in items], dtype=np.int32))
+    # Stored as epoch nanoseconds; load_df converts the whole column to datetimes in one call.
+    now = time.time_ns()
+    rids = [secrets.token_hex(16) for _ in items]
+    records = []
+    for rid, (ioc_value, ioc_type, score, snippet), prediction, likelihood, impact in zip(rids, items, predictions, likelihoods, impacts):
+        if prediction:
+            attack_type = prediction["attack_category"]
+            mitigation_text = "; ".join(prediction["mitigations"][:3]) or "N/A"
+        else:
+            attack_type, mitigation_text = "N/A", "N/A"
+
+        record = create_risk_record(rid, ioc_type, ioc_value, snippet, int(likelihood), int(impact), now)
+        record["attack_type"], record["mitigation"] = attack_type, mitigation_text
+        records.append(record)
+
+    return records, save_records(records)
+
 # -----------------------
 # Upload & Auto Analysis
 # -----------------------
 st.markdown("### 📁 Step 1: Upload your log file to detect risks automatically")
 uploaded_file = st.file_uploader("Supported formats: .txt, .log, .csv", type=["txt", "log", "csv"])
-ABUSEIPDB_KEY = st.secrets.get("ABUSEIPDB_API_KEY", None)
+ABUSEIPDB_KEY = read_secret("ABUSEIPDB_API_KEY", None)
 
 if uploaded_file:
-    content = uploaded_file.read().decode("utf-8", errors="ignore")
     st.info(f"Processing **{uploaded_file.name}**...")
-    iocs = extract_iocs(content)
+    iocs, first_pos = extract_iocs(uploaded_file)
 
     st.markdown("#### Extracted Indicators of Compromise (IOCs)")
     cols = st.columns(5)
@@ -201,7 +348,7 @@ if uploaded_file:
     with st.expander("🔍 View extracted IOC details"):
         for k, vals in iocs.items():
             st.write(f"**{k}** ({len(vals)})")
-            if vals: st.code("\n".join(vals))
+            if vals: st.code("\n".join(sorted(vals)))
 
     # AbuseIPDB Reputation
     ip_results = []
@@ -211,18 +358,20 @@ if uploaded_file:
             st.warning("No API key set. Add ABUSEIPDB_API_KEY in Streamlit secrets.")
         else:
             progress = st.progress(0)
-            for idx, ip in enumerate(iocs["IPs"], 1):
-                ip_results.append(check_abuseipdb(ip, ABUSEIPDB_KEY))
-                progress.progress(int((idx / len(iocs['IPs'])) * 100))
+            ip_results = asyncio.run(check_abuseipdb_all(
+                iocs["IPs"], ABUSEIPDB_KEY,
+                on_progress=lambda done: progress.progress(int((done / len(iocs["IPs"])) * 100)),
+            ))
             progress.empty()
             df_ip = pd.DataFrame(ip_results)
             st.dataframe(df_ip, use_container_width=True)
+    ip_score = {r["ip"]: r["abuseConfidenceScore"] for r in ip_results if "abuseConfidenceScore" in r}
 
     st.divider()
     st.markdown("### ✅ Step 2: Select IOCs to save as risks")
     to_save = []
     for t in iocs.keys():
-        chosen = st.multiselect(f"Select {t} to include", options=iocs[t], key=f"choose_{t}")
+        chosen = st.multiselect(f"Select {t} to include", options=sorted(iocs[t]), key=f"choose_{t}")
         for val in chosen:
             to_save.append((t, val))
 
@@ -230,72 +379,45 @@ if uploaded_file:
         if not to_save:
             st.warning("Please select at least one IOC to save.")
         else:
-            saved_count = 0
-            for ioc_type, ioc_value in to_save:
-                pos = content.find(ioc_value)
-                snippet = content[max(0, pos - 120): min(len(content), pos + 120)] if pos != -1 else f"Detected {ioc_type} {ioc_value}"
-                score = 50
-                if ioc_type == "IPs":
-                    res = next((r for r in ip_results if r.get("ip") == ioc_value and "abuseConfidenceScore" in r), {})
-                    score = int(res.get("abuseConfidenceScore", 50))
-                likelihood, impact = map_score_to_li_impact(score)
-
-                # AI Insights
-                try:
-                    mitigation_info = predict_attack_and_mitigation(ioc_value, ioc_type, score, snippet)
-                    import re
-                    attack_match = re.search(r"Attack Type:\s*\*\*(.*?)\*\*", mitigation_info)
-                    attack_type = attack_match.group(1) if attack_match else "Unknown"
-                    mitigations = [line.strip("-• ").strip() for line in mitigation_info.split("\n") if line.strip().startswith("-")]
-                    mitigation_text = "; ".join(mitigations[:3]) if mitigations else "N/A"
-                except Exception as e:
-                    st.sidebar.warning(f"AI unavailable: {e}")
-                    attack_type, mitigation_text = "N/A", "N/A"
-
-                record = create_risk_record(ioc_type, ioc_value, snippet, likelihood, impact)
-                record["attack_type"], record["mitigation"] = attack_type, mitigation_text
-                save_record(record)
-                saved_count += 1
-
-            st.success(f"✅ Saved {saved_count} IOCs as risks.")
-            st.experimental_rerun()
+            # The saved-risks section below runs after this in the same pass and reads the session copy
+            # extended here, so it shows the new rows without a rerun or a reload of the store.
+            records, stamps = _persist(to_save, ip_score, first_pos, uploaded_file)
+            remember_saved(records, stamps)
+            st.session_state["last_saved"] = len(records)
 
 # -----------------------
 # Display Saved Risks + Heatmap
 # -----------------------
-df = load_df()
+version = risks_version()
+df = session_risks(version)
 st.markdown("---")
 st.subheader("📋 Saved Risks")
-
-if not df.empty:
+if st.session_state.get("last_saved"):
+    st.success(f"✅ Saved {st.session_state.pop('last_saved')} IOCs as risks.")
+
+@st.fragment
+def saved_risks_table():
+    """Top-N saved risks; moving the row slider reruns only this fragment, not the upload scan above it."""
+    # Stamped here rather than passed in, so a fragment-only rerun still picks up saves from other sessions.
+    df = session_risks(risks_version())
     expected_cols = ["risk_name", "attack_type", "likelihood", "impact", "risk_score", "mitigation", "owner", "timestamp"]
     cols = [c for c in expected_cols if c in df.columns] + [c for c in df.columns if c not in expected_cols]
-    st.dataframe(df[cols], use_container_width=True)
-    st.download_button("📥 Download Risk Data", df.to_csv(index=False).encode(), "risks.csv", "text/csv")
+    # Only the top rows are sent to the browser; the full table stays available via the CSV download.
+    view_n = st.slider("Rows to display", 50, 2000, 200, step=50)
+    view = df.sort_values("risk_score", ascending=False).head(view_n) if "risk_score" in df.columns else df.head(view_n)
+    st.dataframe(view[cols], use_container_width=True)
+    if len(df) > view_n:
+        st.caption(f"Showing the {view_n} highest-scoring of {len(df)} risks. Download the CSV for the full table.")
+
+if not df.empty:
+    saved_risks_table()
+    st.download_button("📥 Download Risk Data", cached_csv_bytes(version, df), "risks.csv", "text/csv")
 
     # 🔥 Risk Heatmap
     st.markdown("### 🔥 Risk Matrix Visualization")
-    matrix = build_matrix(df)
-    numeric_matrix = pd.DataFrame(matrix).apply(pd.to_numeric, errors="coerce").fillna(0)
+    matrix = cached_matrix(version, df)
 
-    fig = go.Figure(
-        data=go.Heatmap(
-            z=numeric_matrix,
-            x=[1, 2, 3, 4, 5],
-            y=[5, 4, 3, 2, 1],
-            colorscale=[[0.0, "#00C896"], [0.5, "#FFCE54"], [1.0, "#E74C3C"]],
-            hovertemplate="<b>Likelihood:</b> %{x}<br><b>Impact:</b> %{y}<br><b>Risks:</b> %{z}<extra></extra>",
-            showscale=True,
-            colorbar_title="Risk Level"
-        )
-    )
-    fig.update_layout(
-        paper_bgcolor="#0E1117",
-        plot_bgcolor="#0E1117",
-        width=600, height=500,
-        margin=dict(l=50, r=50, t=60, b=60),
-        title=dict(text="📊 Organizational Risk Matrix", font=dict(size=18, color="#E6E9F0"), x=0.5)
-    )
+    fig = _build_heatmap_fig(tuple(map(tuple, matrix.tolist())))
     st.plotly_chart(fig, use_container_width=False)
 
 else:
@@ -1,7 +1,17 @@
-import random
+import re
 import json
 import os
-import openai
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Optional
+from cachetools import TTLCache
+
+# orjson is optional; model replies are small JSON objects it decodes several times faster than the stdlib.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 # --- Fallback suggestions (used if AI API fails or for offline mode) ---
 RISK_MITIGATION_SUGGESTIONS = {
@@ -32,33 +42,84 @@ RISK_MITIGATION_SUGGESTIONS = {
     ],
 }
 
+# Generic suggestions for descriptions that match no keyword; a fixed pick keeps the result cacheable.
+GENERIC_MITIGATIONS = (
+    "Perform regular risk assessments.",
+    "Implement least-privilege principles.",
+    "Ensure incident response plans are up to date.",
+)
+
+# One alternation over every keyword, so a description is scanned once instead of once per keyword.
+_KW_RE = re.compile("|".join(re.escape(k) for k in RISK_MITIGATION_SUGGESTIONS), re.IGNORECASE)
+_KW_MAP = {k.lower(): tuple(v) for k, v in RISK_MITIGATION_SUGGESTIONS.items()}
+
+@lru_cache(maxsize=4096)
+def _suggest_cached(description: str) -> tuple:
+    """Keyword suggestions for a description, or the generic ones when no keyword matches."""
+    # _KW_RE ignores case, so only the short match is lower-cased, never the whole description.
+    m = _KW_RE.search(description)
+    return _KW_MAP[m.group(0).lower()] if m else GENERIC_MITIGATIONS
+
 def get_mitigation_suggestions(risk_description: str) -> list[str]:
     """Returns fallback mitigation suggestions based on risk keywords."""
-    desc = risk_description.lower()
-    for keyword, suggestions in RISK_MITIGATION_SUGGESTIONS.items():
-        if keyword in desc:
-            return suggestions
-    fallback = [
-        "Perform regular risk assessments.",
-        "Implement least-privilege principles.",
-        "Ensure incident response plans are up to date.",
-        "Enable continuous monitoring for unusual activity.",
-    ]
-    return random.sample(fallback, 3)
+    return list(_suggest_cached(risk_description))
+
+# Read once at import; the predictors check it on every call and the clients are built with it.
+_API_KEY = os.getenv("OPENAI_API_KEY")
+
+def _async_client():
+    """
+    A new AsyncOpenAI client. Use it as "async with _async_client() as client:" so its connection pool is closed
+    before the event loop that opened it goes away.
+    openai is imported here rather than at module load; the offline fallback never needs it.
+    """
+    import openai
+    return openai.AsyncOpenAI(api_key=_API_KEY)
 
 # --- Main AI predictor ---
-def predict_attack_and_mitigation(ioc_value: str, ioc_type: str, abuse_score: int, context: str = "") -> str:
+async def predict_attack_and_mitigation(ioc_value: str, ioc_type: str, abuse_score: int, context: str = "") -> str:
     """
     Uses OpenAI to predict attack category and suggest mitigations.
+    Awaits the model call, so an async caller's event loop keeps running during the round trip.
     Falls back to keyword-based suggestions if AI API is not configured.
     """
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-
     # fallback if no API key
-    if not openai.api_key:
+    if not _API_KEY:
         suggestions = get_mitigation_suggestions(context)
         return f"⚙️ [Offline Mode]\nAttack Type: General Threat\nMitigations:\n- " + "\n- ".join(suggestions)
 
+    try:
+        key = (ioc_value, ioc_type, abuse_score)
+        with _completions_lock:
+            parsed = _completions.get(key)
+        if parsed is None:
+            async with _async_client() as client:
+                # json_object mode guarantees a bare JSON object, so the reply is parsed as-is.
+                parsed = json_loads(await _complete(client, *key, context))
+            with _completions_lock:
+                _completions[key] = parsed
+
+        attack_type = parsed.get("attack_category", "Unknown Threat")
+        mitigations = parsed.get("mitigations", [])
+        formatted = f"🧠 Predicted Attack Type: **{attack_type}**\n\n"
+        formatted += "🔧 Recommended Mitigations:\n" + "\n".join([f"- {m}" for m in mitigations])
+        return formatted
+
+    except Exception as e:
+        suggestions = get_mitigation_suggestions(context)
+        return f"⚠️ AI Error: {e}\nFallback Mitigations:\n- " + "\n- ".join(suggestions)
+
+# Parsed predictions per (ioc_value, ioc_type, abuse_score), shared by both predictors, so IOCs seen again within
+# a day don't repeat the API call. The context snippet is left out of the key: it is only surrounding log text, and
+# keeping it would make the same IOC on another log line a miss. The day-long TTL matches how slowly an IOC's
+# classification changes; callers bucket abuse_score so a small reputation drift still hits.
+# Only replies that parsed are stored; errors, including a reply cut off mid-object, propagate to the caller.
+# Streamlit sessions run on separate threads, hence the lock.
+_completions = TTLCache(maxsize=10_000, ttl=86400)
+_completions_lock = threading.Lock()
+
+async def _complete(client, ioc_value: str, ioc_type: str, abuse_score: int, context: str) -> str:
+    """Raw model output for one IOC."""
     prompt = f"""
     You are a cybersecurity analyst. Analyze the following IOC data and provide structured output.
 
@@ -78,28 +139,97 @@ def predict_attack_and_mitigation(ioc_value: str, ioc_type: str, abuse_score: in
     }}
     """
 
-    try:
-        response = openai.ChatCompletion.create(
+    response = await client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.4,
+        max_tokens=180,
+        response_format={"type": "json_object"},
+    )
+    return response.choices[0].message.content
+
+# --- Batched AI predictor ---
+PREDICT_BATCH_SIZE = 20
+PREDICT_CONCURRENCY = 4
+
+async def _predict_chunk(client, items: list[tuple], sem: asyncio.Semaphore) -> list[Optional[dict]]:
+    """
+    One OpenAI request covering every IOC in items; results come back in input order.
+    An IOC the model left out of its reply comes back as None.
+    """
+    iocs = [
+        {"id": i, "ioc_type": ioc_type, "ioc_value": ioc_value, "abuse_score": abuse_score, "context": context}
+        for i, (ioc_value, ioc_type, abuse_score, context) in enumerate(items)
+    ]
+    prompt = f"""
+    You are a cybersecurity analyst. Analyze each IOC in the following JSON array and provide structured output.
+
+    IOCs: {json.dumps(iocs)}
+
+    For every IOC predict:
+    1. The most likely attack category.
+    2. Three clear, actionable mitigation strategies.
+
+    Return output as a JSON object like:
+    {{
+        "results": [
+            {{"id": <id>, "attack_category": "<attack type>", "mitigations": ["<mitigation 1>", "<mitigation 2>", "<mitigation 3>"]}}
+        ]
+    }}
+    """
+
+    async with sem:
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.4,
-            max_tokens=250,
+            max_tokens=250 * len(items),
+            response_format={"type": "json_object"},
         )
 
-        raw_output = response.choices[0].message["content"]
+    parsed = json_loads(response.choices[0].message.content)
+    by_id = {r.get("id"): r for r in parsed.get("results", [])}
+    return [
+        {
+            "attack_category": by_id[i].get("attack_category", "Unknown Threat"),
+            "mitigations": by_id[i].get("mitigations", []),
+        } if i in by_id else None
+        for i in range(len(items))
+    ]
 
-        # Try to parse JSON from the model output
-        try:
-            parsed = json.loads(raw_output)
-            attack_type = parsed.get("attack_category", "Unknown Threat")
-            mitigations = parsed.get("mitigations", [])
-            formatted = f"🧠 Predicted Attack Type: **{attack_type}**\n\n"
-            formatted += "🔧 Recommended Mitigations:\n" + "\n".join([f"- {m}" for m in mitigations])
-            return formatted
-        except Exception:
-            # fallback: show raw model text if not valid JSON
-            return f"AI Response:\n{raw_output}"
+async def predict_batch(items: list[tuple]) -> list[dict]:
+    """
+    Predicts attack category and mitigations for several IOCs, packing up to PREDICT_BATCH_SIZE IOCs into
+    each OpenAI request and running at most PREDICT_CONCURRENCY requests at once.
+    Each item is (ioc_value, ioc_type, abuse_score, context); results are returned in the same
+    order as dicts with "attack_category" and "mitigations".
+    IOCs already predicted within the day, by either predictor, are served from the cache, and an IOC repeated
+    with different contexts is sent once, with its first context.
+    Falls back to keyword-based suggestions if AI API is not configured.
+    """
+    # fallback if no API key
+    if not _API_KEY:
+        return [
+            {"attack_category": "General Threat", "mitigations": get_mitigation_suggestions(context)}
+            for _, _, _, context in items
+        ]
 
-    except Exception as e:
-        suggestions = get_mitigation_suggestions(context)
-        return f"⚠️ AI Error: {e}\nFallback Mitigations:\n- " + "\n- ".join(suggestions)
+    keys = [item[:3] for item in items]
+    with _completions_lock:
+        found = {key: _completions.get(key) for key in keys}
+    first = {}
+    for key, item in zip(keys, items):
+        first.setdefault(key, item)
+    todo = [first[key] for key, prediction in found.items() if prediction is None]
+    sem = asyncio.Semaphore(PREDICT_CONCURRENCY)
+    chunks = [todo[i:i + PREDICT_BATCH_SIZE] for i in range(0, len(todo), PREDICT_BATCH_SIZE)]
+    results = []
+    if chunks:
+        # One client, and so one connection pool, for every chunk of this call; closed once they are all done.
+        async with _async_client() as client:
+            results = await asyncio.gather(*(_predict_chunk(client, chunk, sem) for chunk in chunks))
+    fresh = {item[:3]: p for chunk, preds in zip(chunks, results) for item, p in zip(chunk, preds) if p is not None}
+    with _completions_lock:
+        _completions.update(fresh)
+    found.update(fresh)
+    return [found[key] or {"attack_category": "Unknown Threat", "mitigations": []} for key in keys]
@@ -1,25 +1,78 @@
 # File: /grc-risk-dashboard/grc-risk-dashboard/src/grc_risk_dashboard/api/routes.py
 
 # This file is intended to define the API routes for the GRC Risk Dashboard.
-# TODO: Implement the API endpoints for risk data retrieval and manipulation.
 # Consider using a web framework like Flask or FastAPI for routing.
 
+import asyncio
+import json
+import logging
+import time
+
 from fastapi import APIRouter
 
+from ai_helper import predict_batch
+from grc_risk_dashboard import helpers
+from grc_risk_dashboard.models import Risk
+
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _risks_as_records() -> list:
+    """Load the risk store as JSON-ready dicts (NaN/NA become null, timestamps ISO strings)."""
+    return json.loads(helpers.load_df().to_json(orient="records", date_format="iso"))
 
 @router.get("/risks")
 async def get_risks():
     """
-    TODO: Implement logic to retrieve risk data.
-    This endpoint should return a list of risks.
+    Return every saved risk.
+    The store is read in a worker thread so the event loop keeps serving other requests meanwhile.
+    """
+    return await asyncio.to_thread(_risks_as_records)
+
+@router.get("/risks/matrix")
+async def get_risk_matrix():
+    """
+    Return the 5x5 likelihood/impact matrix, rows from impact 5 down to 1 and columns from likelihood 1 to 5.
+    Only the two level columns are read from the store, in a worker thread.
     """
-    return {"message": "This endpoint will return risk data."}
+    matrix = await asyncio.to_thread(helpers.store_matrix)
+    return {"matrix": matrix.tolist()}
 
 @router.post("/risks")
-async def create_risk(risk_data: dict):
+async def create_risk(risk: Risk):
+    """
+    Save a new risk entry; the id, score, cell and timestamp are filled in server-side.
+    The append runs in a worker thread, like the read in get_risks.
+    """
+    await asyncio.to_thread(helpers.save_record, risk.to_record())
+    return {"message": "Risk saved."}
+
+# predict_batch takes IOC-shaped items. API risks carry no IOC type or reputation score, so they are described to
+# the model as a generic risk at the neutral score the dashboard uses for IOCs without a reputation lookup.
+RISK_IOC_TYPE = "Risk"
+NEUTRAL_ABUSE_SCORE = 50
+
+@router.post("/risks/batch")
+async def create_risks(risks: list[Risk]):
     """
-    TODO: Implement logic to create a new risk entry.
-    This endpoint should accept risk data and save it.
+    Save several risk entries with a single store write; each gets the server-side fields create_risk fills in.
+    Entries without a mitigation are enriched first through predict_batch, which packs them into a few
+    concurrent, semaphore-bounded OpenAI requests instead of one round trip per entry.
     """
-    return {"message": "This endpoint will create a new risk entry."}
\ No newline at end of file
+    now = time.time_ns()
+    records = [risk.to_record(now) for risk in risks]
+    missing = [r for r in records if not r["mitigation"]]
+    if missing:
+        items = [(r["risk_name"], RISK_IOC_TYPE, NEUTRAL_ABUSE_SCORE, r["risk_description"]) for r in missing]
+        try:
+            predictions = await predict_batch(items)
+        except Exception:
+            # Enrichment is best effort; the risks are saved without it, as the dashboard does.
+            logger.warning("AI enrichment failed for %d risks; saving them without it", len(items), exc_info=True)
+            predictions = [None] * len(items)
+        for record, prediction in zip(missing, predictions):
+            if prediction:
+                record["attack_type"] = record["attack_type"] or prediction["attack_category"]
+                record["mitigation"] = "; ".join(prediction["mitigations"][:3]) or "N/A"
+    await asyncio.to_thread(helpers.save_records, records)
+    return {"message": "Risks saved.", "count": len(records)}
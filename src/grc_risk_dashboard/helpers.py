@@ -1,9 +1,49 @@
 import pandas as pd
 import numpy as np
 import os
-from typing import Dict, Tuple, Optional
+import re
+import csv
+import io
+import time
+import secrets
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    from numba import njit, types as nb_types
+except ImportError:  # numba is optional; build_matrix falls back to np.bincount
+    njit = None
 
 CSV_FILE_PATH = "risks.csv"
+PARQUET_DIR = "data"
+# "csv" (default) or "parquet"; Parquet skips text parsing on load and writes one file per saved batch.
+STORE_FORMAT = os.getenv("GRC_STORE_FORMAT", "csv").lower()
+
+# Column order of the risk store; new rows are appended in exactly this layout.
+COLUMNS = [
+    "risk_id", "risk_name", "risk_description",
+    "likelihood", "impact", "risk_score",
+    "risk_cell", "owner", "attack_type", "mitigation", "timestamp"
+]
+
+# Column types for CSV reads, so the parser skips type inference; nullable ints tolerate blank cells.
+# Timestamps are read as text and converted by _parse_timestamps (epoch nanoseconds or legacy date strings).
+CSV_DTYPES = {
+    "risk_id": "string", "risk_name": "string", "risk_description": "string",
+    "likelihood": "Int8", "impact": "Int8", "risk_score": "Int16",
+    "risk_cell": "string", "owner": "string", "attack_type": "string",
+    "mitigation": "string", "timestamp": "string",
+}
+
+# Column types for the Parquet store, so every batch file shares one schema.
+PARQUET_SCHEMA = pa.schema([
+    ("risk_id", pa.string()), ("risk_name", pa.string()), ("risk_description", pa.string()),
+    ("likelihood", pa.int64()), ("impact", pa.int64()), ("risk_score", pa.int64()),
+    ("risk_cell", pa.string()), ("owner", pa.string()), ("attack_type", pa.string()),
+    ("mitigation", pa.string()), ("timestamp", pa.int64()),
+])
 
 KEYWORD_MAP: Dict[str, Tuple[int, int]] = {
     "data breach": (4, 5),
@@ -13,46 +53,217 @@ KEYWORD_MAP: Dict[str, Tuple[int, int]] = {
     "system failure": (2, 3),
 }
 
+# Likelihood and impact are both on a 1-5 scale, so every "LxI" cell label can be built once up front.
+CELL_LABELS: Dict[Tuple[int, int], str] = {(l, i): f"{l}x{i}" for l in range(1, 6) for i in range(1, 6)}
+
+def _parse_timestamps(col: pd.Series) -> pd.Series:
+    """Convert epoch-nanosecond timestamps in one vectorised call; older rows stored as date strings are parsed too."""
+    ns = pd.to_numeric(col, errors="coerce")
+    out = pd.to_datetime(ns, unit="ns")
+    legacy = ns.isna() & col.notna()
+    if legacy.any():
+        out[legacy] = pd.to_datetime(col[legacy], errors="coerce", format="mixed")
+    return out
+
+def _parquet_files() -> List[str]:
+    """Batch files of the Parquet store, oldest first."""
+    if not os.path.isdir(PARQUET_DIR):
+        return []
+    return sorted(os.path.join(PARQUET_DIR, f) for f in os.listdir(PARQUET_DIR) if f.endswith(".parquet"))
+
+def data_version() -> Tuple[int, int]:
+    """Cheap stamp that changes whenever the risk store is written; use it as a cache key."""
+    if STORE_FORMAT == "parquet":
+        files = _parquet_files()
+        return (len(files), max((os.stat(f).st_mtime_ns for f in files), default=0))
+    # Size changes on every append, so two saves within the filesystem's mtime granularity still differ.
+    try:
+        stat = os.stat(CSV_FILE_PATH)
+    except FileNotFoundError:
+        return (0, 0)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _empty_df() -> pd.DataFrame:
+    """Empty risk table with the same column types a loaded store has."""
+    return pd.DataFrame(columns=COLUMNS).astype({**CSV_DTYPES, "timestamp": "datetime64[ns]"})
+
 def load_df() -> pd.DataFrame:
-    """Load risks from CSV or return an empty DataFrame."""
+    """Load risks from CSV (or the Parquet store when enabled) or return an empty DataFrame."""
+    if STORE_FORMAT == "parquet":
+        files = _parquet_files()
+        if not files:
+            return _empty_df()
+        df = pq.ParquetDataset(files, schema=PARQUET_SCHEMA).read().to_pandas()
+        df["timestamp"] = _parse_timestamps(df["timestamp"])
+        return df
     if os.path.exists(CSV_FILE_PATH):
-        return pd.read_csv(CSV_FILE_PATH)
+        try:
+            df = pd.read_csv(CSV_FILE_PATH, dtype=CSV_DTYPES, engine="pyarrow")
+        except ValueError:
+            # Hand-edited files with non-numeric levels still load; build_matrix skips those rows.
+            df = pd.read_csv(CSV_FILE_PATH)
+        if "timestamp" in df.columns:
+            df["timestamp"] = _parse_timestamps(df["timestamp"])
+        return df
     else:
-        columns = [
-            "risk_id", "risk_name", "risk_description",
-            "likelihood", "impact", "risk_score",
-            "risk_cell", "owner", "mitigation", "timestamp"
-        ]
-        return pd.DataFrame(columns=columns)
+        return _empty_df()
 
 def save_record(record: Dict) -> None:
     """Append a dictionary record to 'risks.csv'."""
-    df = load_df()
-    new_df = pd.DataFrame([record])
-    df = pd.concat([df, new_df], ignore_index=True)
-    df.to_csv(CSV_FILE_PATH, index=False)
+    save_records([record])
+
+def _stored_header() -> Optional[List[str]]:
+    """Header row of the existing CSV, or None if there is no file or it is empty."""
+    if not os.path.exists(CSV_FILE_PATH):
+        return None
+    with open(CSV_FILE_PATH, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+def _stamp(st: os.stat_result) -> Tuple[int, int]:
+    return (st.st_mtime_ns, st.st_size)
+
+def save_records(records: List[Dict]) -> Tuple[Tuple[int, int], Optional[Tuple[int, int]]]:
+    """
+    Append a batch of dictionary records to 'risks.csv' with a single write.
+    Collect rows into a list and call this once; each call costs one open and one append, not a rewrite.
+    Returns the data_version() stamps just before and just after the write. The after stamp is None unless this
+    write is known to be the only change between the two, so a caller holding the rows as of the before stamp
+    can add the new ones and treat its copy as current at the after stamp.
+    """
+    if STORE_FORMAT == "parquet":
+        # Each batch becomes its own immutable file, so saving never rewrites earlier data.
+        os.makedirs(PARQUET_DIR, exist_ok=True)
+        path = os.path.join(PARQUET_DIR, f"{time.time_ns()}-{secrets.token_hex(4)}.parquet")
+        before = data_version()
+        pq.write_table(pa.Table.from_pylist(records, schema=PARQUET_SCHEMA), path)
+        after = data_version()
+        # Any other writer adds its own file, so exactly one new file means only ours landed in between.
+        return before, after if after[0] == before[0] + 1 else None
+    header = _stored_header()
+    if header is not None and not set(COLUMNS).issubset(header):
+        # A store written with an older column layout is migrated once; later saves append.
+        # Legacy rows may predate risk_score/risk_cell, so both are recomputed for the whole store.
+        before = data_version()
+        df = score_risks(pd.concat([load_df(), pd.DataFrame(records, columns=COLUMNS)], ignore_index=True))
+        df.reindex(columns=COLUMNS + [c for c in df.columns if c not in COLUMNS]).to_csv(CSV_FILE_PATH, index=False)
+        return before, None
+    # Only the new rows are written, in the file's own column order; the existing store is never re-read.
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=header or COLUMNS, extrasaction="ignore", lineterminator="\n")
+    if header is None:
+        writer.writeheader()
+    writer.writerows(records)
+    data = buf.getvalue().encode("utf-8")
+    existed = os.path.exists(CSV_FILE_PATH)
+    with open(CSV_FILE_PATH, "ab") as f:
+        start = os.fstat(f.fileno())
+        f.write(data)
+        f.flush()
+        end = os.fstat(f.fileno())
+    before = _stamp(start) if existed else (0, 0)
+    # The file only grows by appends, so growth of exactly our bytes means no other append interleaved.
+    return before, _stamp(end) if end.st_size == start.st_size + len(data) else None
 
 def score_risk(likelihood: int, impact: int) -> int:
     """Calculate risk score."""
     return likelihood * impact
 
+def score_risks(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fill risk_score and risk_cell for every row from its likelihood and impact, one whole-column operation each
+    instead of a score_risk call per row. Rows with a missing or non-numeric level get NA in both.
+    """
+    likelihood = pd.to_numeric(df["likelihood"], errors="coerce").astype("Int16")
+    impact = pd.to_numeric(df["impact"], errors="coerce").astype("Int16")
+    df["risk_score"] = likelihood * impact
+    df["risk_cell"] = likelihood.astype("string") + "x" + impact.astype("string")
+    return df
+
+# All keywords in one case-insensitive alternation, so a description is scanned once rather than once per
+# keyword, and never copied into a lower-cased string first; only the short matches are lower-cased.
+KEYWORD_RE = re.compile("|".join(map(re.escape, KEYWORD_MAP)), re.IGNORECASE)
+# The regex finds keywords in text order, but KEYWORD_MAP order decides which one wins.
+_KEYWORD_RANK = {k: rank for rank, k in enumerate(KEYWORD_MAP)}
+
+@lru_cache(maxsize=4096)
 def auto_assign(description: str) -> Optional[Tuple[int, int]]:
-    """Auto-assign likelihood and impact based on keywords."""
-    desc = description.lower().strip()
-    for keyword, values in KEYWORD_MAP.items():
-        if keyword in desc:
-            return values
-    return None
-
-def build_matrix(df: pd.DataFrame) -> np.ndarray:
+    """
+    Auto-assign likelihood and impact based on keywords; when several appear, the one listed first in KEYWORD_MAP wins.
+    Repeated descriptions are answered from a cache.
+    """
+    found = (m.group(0).lower() for m in KEYWORD_RE.finditer(description))
+    keyword = min(found, key=_KEYWORD_RANK.__getitem__, default=None)
+    return KEYWORD_MAP[keyword] if keyword else None
+
+if njit is not None:
+    # The explicit signature compiles the kernel at import (or loads it from the on-disk cache) instead of on the
+    # first build_matrix call, so the first dashboard render or API request doesn't pay the compile.
+    # Arrays are typed read-only because that is what copy-on-write pandas hands back; writable arrays match it too.
+    _LEVELS = nb_types.Array(nb_types.float64, 1, "A", readonly=True)
+
+    @njit(nb_types.int64[:, :](_LEVELS, _LEVELS), cache=True, boundscheck=False)
+    def _tally_cells(likelihood, impact):
+        """
+        Count risks per (impact, likelihood) cell in one compiled pass over the raw float levels.
+        Truncation and the 1..5 range check happen per element, so no masks or int copies are built;
+        NaN fails both comparisons and is skipped.
+        """
+        out = np.zeros((5, 5), np.int64)
+        for k in range(likelihood.size):
+            l = np.trunc(likelihood[k])
+            i = np.trunc(impact[k])
+            if 1 <= l <= 5 and 1 <= i <= 5:
+                out[5 - int(i), int(l) - 1] += 1
+        return out
+
+def _count_cells(likelihood, impact):
+    """Tally float likelihood/impact level arrays into the 5x5 matrix, skipping anything outside 1..5."""
+    if njit is not None:
+        return _tally_cells(likelihood, impact)
+    likelihood, impact = np.trunc(likelihood), np.trunc(impact)
+    valid = (likelihood >= 1) & (likelihood <= 5) & (impact >= 1) & (impact <= 5)
+    # Levels are 1..5, so int8 is enough and keeps the arrays handed to bincount an eighth the size of int64.
+    likelihood, impact = likelihood[valid].astype(np.int8), impact[valid].astype(np.int8)
+    # Row 0 is impact 5 and column 0 is likelihood 1, matching the heatmap axes.
+    return np.bincount((5 - impact) * 5 + (likelihood - 1), minlength=25).reshape(5, 5)
+
+def _levels(col):
+    return pd.to_numeric(col, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def build_matrix(df):
     """Build 5x5 matrix of risks by likelihood/impact."""
-    matrix = np.zeros((5, 5), dtype=int)
-    for _, row in df.iterrows():
-        try:
-            likelihood = int(row["likelihood"]) - 1
-            impact = int(row["impact"]) - 1
-            if 0 <= likelihood < 5 and 0 <= impact < 5:
-                matrix[4 - impact, likelihood] += 1
-        except (ValueError, KeyError, TypeError):
-            continue
+    if "likelihood" not in df.columns or "impact" not in df.columns:
+        return np.zeros((5, 5), dtype=int)
+    return _count_cells(_levels(df["likelihood"]), _levels(df["impact"]))
+
+def build_matrix_from_csv(path: Optional[str] = None, chunksize: int = 100_000) -> np.ndarray:
+    """
+    Build the 5x5 matrix straight from the CSV store, reading only the two level columns
+    a chunk at a time so memory stays bounded however large the file grows.
+    """
+    path = path or CSV_FILE_PATH
+    matrix = np.zeros((5, 5), dtype=np.int64)
+    if not os.path.exists(path):
+        return matrix
+    with open(path, newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), None)
+    if not header or "likelihood" not in header or "impact" not in header:
+        return matrix
+    # The pyarrow engine has no chunksize support, so the chunked path uses the C parser;
+    # levels are coerced per chunk so a stray bad row is skipped rather than aborting the scan.
+    for chunk in pd.read_csv(path, usecols=["likelihood", "impact"], chunksize=chunksize):
+        matrix += _count_cells(_levels(chunk["likelihood"]), _levels(chunk["impact"]))
     return matrix
+
+def store_matrix() -> np.ndarray:
+    """
+    Build the 5x5 matrix for the whole store while reading only the likelihood and impact columns:
+    the Parquet store projects those two column chunks out of each batch file, the CSV store streams them in chunks.
+    """
+    if STORE_FORMAT != "parquet":
+        return build_matrix_from_csv()
+    files = _parquet_files()
+    if not files:
+        return np.zeros((5, 5), dtype=np.int64)
+    table = pq.ParquetDataset(files, schema=PARQUET_SCHEMA).read(columns=["likelihood", "impact"])
+    return build_matrix(table.to_pandas(types_mapper=pd.ArrowDtype))
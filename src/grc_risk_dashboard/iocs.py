@@ -0,0 +1,91 @@
+"""
+IOC extraction for uploaded logs: one bytes regex scanned over the stream in chunks cut at separators.
+"""
+import re
+from typing import Dict, Tuple
+
+# Prefer RE2's linear-time matcher for log scanning when it is installed.
+try:
+    import re2 as regex_engine
+except ImportError:
+    regex_engine = re
+
+_IPV4 = rb"(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)"
+_HASH = rb"\b(?:[a-fA-F0-9]{64}|[a-fA-F0-9]{40}|[a-fA-F0-9]{32})\b"
+
+IOC_PATTERN = (
+    rb"(?P<IPs>\b" + _IPV4 + rb"\b)"
+    rb"|(?P<URLs>https?://(?P<Domains>[^\s,;/?#]+)[^\s,;]*)"
+    rb"|(?P<Hashes>" + _HASH + rb")"
+    rb"|(?P<Emails>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)"
+)
+
+# The URL branch consumes the whole URL, so an IP host or a hash in the path is picked out of each URL hit
+# with these instead; both only ever run over a single URL.
+_IPV4_RE = regex_engine.compile(_IPV4)
+_HASH_RE = regex_engine.compile(_HASH)
+
+def compile_ioc_re(engine=regex_engine):
+    """Compile the IOC pattern with the given regex module (re or re2)."""
+    return engine.compile(IOC_PATTERN)
+
+IOC_RE = compile_ioc_re()
+
+# Kind of each top-level IOC group, by group number (RE2 reports bytes group names for bytes patterns).
+# The nested Domains group is group 3; a URL hit may report either 2 or 3 as lastindex depending on the engine.
+_IOC_KINDS = (None, "IPs", "URLs", "URLs", "Hashes", "Emails")
+_DOMAIN_GROUP = 3
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+_SEPARATORS = (b"\n", b"\r", b" ", b"\t", b",", b";")
+# Upper bound on the unfinished token carried between chunks; far longer than any real IOC.
+MAX_CARRY = 64 * 1024
+
+def extract_iocs(stream, chunk_size: int = SCAN_CHUNK_SIZE, ioc_re=None) -> Tuple[Dict[str, list], Dict[str, int]]:
+    """
+    Extract common IOCs from a binary stream, scanning it in chunks cut at separators and decoding only the matches.
+    Also returns the byte offset of each IOC's first occurrence, for building context snippets.
+    ioc_re defaults to IOC_RE; pass compile_ioc_re(re) to force the stdlib engine.
+    """
+    ioc_re = ioc_re or IOC_RE
+    # Each bucket maps a distinct match to the offset where it was first seen.
+    buckets = {"IPs": {}, "URLs": {}, "Domains": {}, "Hashes": {}, "Emails": {}}
+    tail = b""
+    base = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        buf = tail + chunk
+        if chunk:
+            # No IOC pattern matches whitespace, "," or ";", so cutting after the last of them never splits a match;
+            # the unfinished token is carried into the next chunk. Checking every separator, not just newlines,
+            # keeps the carry small on single-line input such as minified JSON.
+            cut = max(buf.rfind(sep) for sep in _SEPARATORS) + 1
+            if len(buf) - cut > MAX_CARRY:
+                # A separator-free run longer than any IOC: carry only its last MAX_CARRY bytes instead of
+                # recopying an ever growing tail on every read. Only an IOC spanning that cut can be missed.
+                cut = len(buf) - MAX_CARRY
+            buf, tail = buf[:cut], buf[cut:]
+        for m in ioc_re.finditer(buf):
+            kind = _IOC_KINDS[m.lastindex]
+            buckets[kind].setdefault(m.group(), base + m.start())
+            if kind == "URLs":
+                host, host_pos = m.group(_DOMAIN_GROUP), base + m.start(_DOMAIN_GROUP)
+                buckets["Domains"].setdefault(host, host_pos)
+                addr = host.split(b":", 1)[0]
+                if _IPV4_RE.fullmatch(addr):
+                    buckets["IPs"].setdefault(addr, host_pos)
+                for h in _HASH_RE.finditer(m.group()):
+                    buckets["Hashes"].setdefault(h.group(), base + m.start() + h.start())
+        base += len(buf)
+        if not chunk:
+            break
+    found = {k: {} for k in buckets}
+    for k, vals in buckets.items():
+        for v, pos in vals.items():
+            found[k].setdefault(v.decode("utf-8", errors="ignore"), pos)
+    first_pos = {}
+    for vals in found.values():
+        for v, pos in vals.items():
+            first_pos[v] = min(first_pos.get(v, pos), pos)
+    # Buckets are filled in scan order, so each list is already deduplicated in first-seen order.
+    iocs = {k: list(found[k]) for k in ("IPs", "URLs", "Domains", "Hashes", "Emails")}
+    return iocs, first_pos
@@ -3,16 +3,38 @@
 """
 models.py
 
-This module will define the data models for the GRC Risk Dashboard application.
-
-TODO:
-- Define the Risk model with relevant fields (e.g., id, name, description, likelihood, impact).
-- Implement methods for data validation and manipulation.
-- Consider relationships with other models if necessary.
+Data models for the GRC Risk Dashboard application.
 """
 
-class Risk:
-    """Placeholder for the Risk model."""
-    pass
+import secrets
+import time
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from grc_risk_dashboard import helpers
+
+class Risk(BaseModel):
+    """A risk as submitted to the API. Unknown fields are rejected rather than silently dropped."""
+    model_config = ConfigDict(extra="forbid")
+
+    risk_name: str
+    risk_description: str = ""
+    likelihood: int = Field(ge=1, le=5)
+    impact: int = Field(ge=1, le=5)
+    owner: str = ""
+    attack_type: str = ""
+    mitigation: str = ""
 
-# Additional models can be defined here as needed.
\ No newline at end of file
+    def to_record(self, timestamp: Optional[int] = None) -> dict:
+        """
+        The stored row for this risk, with the same server-side fields the dashboard fills in:
+        a fresh risk_id, risk_score, risk_cell and an epoch-nanosecond timestamp.
+        """
+        return {
+            "risk_id": secrets.token_hex(16),
+            **self.model_dump(),
+            "risk_score": helpers.score_risk(self.likelihood, self.impact),
+            "risk_cell": helpers.CELL_LABELS[(self.likelihood, self.impact)],
+            "timestamp": time.time_ns() if timestamp is None else timestamp,
+        }
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+from cachetools import TTLCache
+
+import ai_helper
+
+
+class FakeClient:
+    """Stands in for AsyncOpenAI: records each request and answers batch prompts by echoing every IOC."""
+
+    def __init__(self, drop_ids=()):
+        self.calls = []
+        self.drop_ids = set(drop_ids)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        prompt = kwargs["messages"][0]["content"]
+        batch = re.search(r"IOCs: (\[.*\])", prompt)
+        if batch:
+            iocs = json.loads(batch.group(1))
+            content = {"results": [
+                {"id": ioc["id"], "attack_category": ioc["ioc_value"], "mitigations": [ioc["context"]]}
+                for ioc in iocs if ioc["id"] not in self.drop_ids
+            ]}
+        else:
+            content = {"attack_category": "Single", "mitigations": ["m"]}
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(content)))])
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(ai_helper, "_API_KEY", "test-key")
+    monkeypatch.setattr(ai_helper, "_async_client", lambda: fake)
+    monkeypatch.setattr(ai_helper, "_completions", TTLCache(maxsize=100, ttl=3600))
+    return fake
+
+
+def _items(n, prefix="ioc"):
+    return [(f"{prefix}{i}", "IPs", 50, f"ctx{i}") for i in range(n)]
+
+
+def test_predict_batch_serves_repeats_from_the_cache(client):
+    items = _items(3)
+    first = asyncio.run(ai_helper.predict_batch(items + items[:1]))
+    assert len(client.calls) == 1
+    assert len(json.loads(re.search(r"IOCs: (\[.*\])", client.calls[0]["messages"][0]["content"]).group(1))) == 3
+    assert [p["attack_category"] for p in first] == ["ioc0", "ioc1", "ioc2", "ioc0"]
+
+    again = asyncio.run(ai_helper.predict_batch(items[::-1] + _items(1, "new")))
+    assert len(client.calls) == 2
+    assert [p["attack_category"] for p in again] == ["ioc2", "ioc1", "ioc0", "new0"]
+
+
+def test_single_prediction_shares_the_batch_cache(client):
+    asyncio.run(ai_helper.predict_batch(_items(1)))
+    text = asyncio.run(ai_helper.predict_attack_and_mitigation(*_items(1)[0]))
+    assert len(client.calls) == 1
+    assert "ioc0" in text
+
+    asyncio.run(ai_helper.predict_attack_and_mitigation("other", "URLs", 50, "c"))
+    asyncio.run(ai_helper.predict_attack_and_mitigation("other", "URLs", 50, "c"))
+    assert len(client.calls) == 2
+
+
+def _sent_ids(call):
+    return [ioc["ioc_value"] for ioc in json.loads(re.search(r"IOCs: (\[.*\])", call["messages"][0]["content"]).group(1))]
+
+
+def test_predict_batch_chunks_requests_and_keeps_order(client, monkeypatch):
+    monkeypatch.setattr(ai_helper, "PREDICT_BATCH_SIZE", 4)
+    items = _items(10)
+    result = asyncio.run(ai_helper.predict_batch(items))
+    assert sorted(len(_sent_ids(c)) for c in client.calls) == [2, 4, 4]
+    assert sorted(v for c in client.calls for v in _sent_ids(c)) == sorted(v for v, _, _, _ in items)
+    assert [p["attack_category"] for p in result] == [v for v, _, _, _ in items]
+    assert [p["mitigations"] for p in result] == [[c] for _, _, _, c in items]
+
+
+def test_predict_batch_fills_in_iocs_the_model_omitted(client):
+    client.drop_ids = {1}
+    result = asyncio.run(ai_helper.predict_batch(_items(3)))
+    assert result[1] == {"attack_category": "Unknown Threat", "mitigations": []}
+    assert [result[0]["attack_category"], result[2]["attack_category"]] == ["ioc0", "ioc2"]
+    # The omitted IOC is not cached, so the next call asks for it again.
+    client.drop_ids = set()
+    asyncio.run(ai_helper.predict_batch(_items(3)))
+    assert _sent_ids(client.calls[-1]) == ["ioc1"]
+
+
+def test_predict_batch_offline_uses_keyword_suggestions(monkeypatch):
+    monkeypatch.setattr(ai_helper, "_API_KEY", None)
+    monkeypatch.setattr(ai_helper, "_async_client", lambda: pytest.fail("no client offline"))
+    result = asyncio.run(ai_helper.predict_batch([("1.2.3.4", "IPs", 90, "phishing kit"), ("x", "URLs", 50, "")]))
+    assert result[0] == {
+        "attack_category": "General Threat",
+        "mitigations": ai_helper.get_mitigation_suggestions("phishing kit"),
+    }
+    assert result[1]["mitigations"] == list(ai_helper.GENERIC_MITIGATIONS)
+
+
+def test_cache_ignores_the_context_snippet(client):
+    asyncio.run(ai_helper.predict_batch([("1.2.3.4", "IPs", 50, "first line")]))
+    again = asyncio.run(ai_helper.predict_batch([
+        ("1.2.3.4", "IPs", 50, "another line"),
+        ("5.6.7.8", "IPs", 50, "a"),
+        ("5.6.7.8", "IPs", 50, "b"),
+    ]))
+    assert len(client.calls) == 2
+    assert _sent_ids(client.calls[1]) == ["5.6.7.8"]
+    assert [p["mitigations"] for p in again] == [["first line"], ["a"], ["a"]]
@@ -0,0 +1,86 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import ai_helper
+from grc_risk_dashboard import helpers
+from grc_risk_dashboard.api.routes import router
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(helpers, "CSV_FILE_PATH", str(tmp_path / "risks.csv"))
+    monkeypatch.setattr(helpers, "PARQUET_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(ai_helper, "_API_KEY", None)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("store", ["csv", "parquet"])
+def test_create_risk_fills_server_side_fields(client, monkeypatch, store):
+    monkeypatch.setattr(helpers, "STORE_FORMAT", store)
+    resp = client.post("/risks", json={"risk_name": "Phishing wave", "likelihood": "3", "impact": 4})
+    assert resp.status_code == 200
+    [row] = client.get("/risks").json()
+    assert len(row["risk_id"]) == 32
+    assert (row["likelihood"], row["impact"], row["risk_score"], row["risk_cell"]) == (3, 4, 12, "3x4")
+    assert row["timestamp"] is not None
+
+
+@pytest.mark.parametrize("body", [
+    {"risk_name": "x", "likelihood": 6, "impact": 1},
+    {"risk_name": "x", "likelihood": "high", "impact": 1},
+    {"risk_name": "x", "likelihood": 1, "impact": 1, "severity": "high"},
+    {"likelihood": 1, "impact": 1},
+])
+def test_create_risk_rejects_invalid_input(client, body):
+    assert client.post("/risks", json=body).status_code == 422
+    assert client.get("/risks").json() == []
+
+
+def test_create_risks_enriches_missing_mitigations_offline(client):
+    resp = client.post("/risks/batch", json=[
+        {"risk_name": "Phishing wave", "risk_description": "phishing mails", "likelihood": 3, "impact": 4},
+        {"risk_name": "Old server", "likelihood": 1, "impact": 2, "mitigation": "Retire it"},
+    ])
+    assert resp.json() == {"message": "Risks saved.", "count": 2}
+    enriched, kept = client.get("/risks").json()
+    assert enriched["attack_type"] == "General Threat"
+    assert enriched["mitigation"] == "; ".join(ai_helper.get_mitigation_suggestions("phishing mails"))
+    assert kept["mitigation"] == "Retire it"
+    assert (enriched["risk_cell"], kept["risk_score"]) == ("3x4", 2)
+    assert enriched["timestamp"] == kept["timestamp"]
+
+
+def test_create_risks_saves_unenriched_when_prediction_fails(client, monkeypatch, caplog):
+    async def broken(items):
+        raise RuntimeError("model down")
+    monkeypatch.setattr("grc_risk_dashboard.api.routes.predict_batch", broken)
+    assert client.post("/risks/batch", json=[{"risk_name": "x", "likelihood": 2, "impact": 2}]).status_code == 200
+    [row] = client.get("/risks").json()
+    assert not row["mitigation"]
+    assert "AI enrichment failed" in caplog.text
+
+
+def test_create_risks_rejects_the_whole_batch_on_invalid_input(client):
+    resp = client.post("/risks/batch", json=[
+        {"risk_name": "ok", "likelihood": 1, "impact": 1},
+        {"risk_name": "bad", "likelihood": 9, "impact": 1},
+    ])
+    assert resp.status_code == 422
+    assert client.get("/risks").json() == []
+
+
+@pytest.mark.parametrize("store", ["csv", "parquet"])
+def test_risk_matrix_reads_the_store(client, monkeypatch, store):
+    monkeypatch.setattr(helpers, "STORE_FORMAT", store)
+    assert client.get("/risks/matrix").json() == {"matrix": [[0] * 5] * 5}
+    client.post("/risks/batch", json=[
+        {"risk_name": "a", "likelihood": 1, "impact": 5, "mitigation": "m"},
+        {"risk_name": "b", "likelihood": 1, "impact": 5, "mitigation": "m"},
+        {"risk_name": "c", "likelihood": 4, "impact": 2, "mitigation": "m"},
+    ])
+    matrix = client.get("/risks/matrix").json()["matrix"]
+    assert matrix[0][0] == 2 and matrix[3][3] == 1
+    assert sum(map(sum, matrix)) == 3
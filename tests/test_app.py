@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+import streamlit as st
+from streamlit.errors import StreamlitSecretNotFoundError
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(__file__), os.pardir, "app.py")
+
+
+def test_login_without_secrets_file_shows_config_error(monkeypatch):
+    def no_secrets_file(self, *args, **kwargs):
+        raise StreamlitSecretNotFoundError("No secrets found.")
+    monkeypatch.setattr(type(st.secrets), "_parse", no_secrets_file)
+    at = AppTest.from_file(APP, default_timeout=30).run()
+    assert not at.exception
+    assert [e.value for e in at.error] == ["Login is not configured. Set admin_user and admin_bcrypt in Streamlit secrets."]
@@ -0,0 +1,75 @@
+import io
+import re
+
+import pytest
+
+from grc_risk_dashboard import iocs
+
+ENGINES = [re]
+try:
+    import re2
+    ENGINES.append(re2)
+except ImportError:
+    pass
+
+LOG = (
+    b"x 10.0.0.9 http://b.com/x a@b.io http://c.net?z=1\n"
+    + b"1.2.3.4 https://a.org:80/p?q d41d8cd98f00b204e9800998ecf8427e\n" * 3
+    + b"10.0.0.9 http://b.com/y\n"
+)
+
+
+@pytest.mark.parametrize("engine", ENGINES, ids=lambda e: e.__name__)
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_extract_iocs_is_chunk_invariant(engine, chunk_size):
+    found, first_pos = iocs.extract_iocs(io.BytesIO(LOG), chunk_size, iocs.compile_ioc_re(engine))
+    assert found == {
+        "IPs": ["10.0.0.9", "1.2.3.4"],
+        "URLs": ["http://b.com/x", "http://c.net?z=1", "https://a.org:80/p?q", "http://b.com/y"],
+        "Domains": ["b.com", "c.net", "a.org:80"],
+        "Hashes": ["d41d8cd98f00b204e9800998ecf8427e"],
+        "Emails": ["a@b.io"],
+    }
+    # Every offset is the first occurrence in the whole stream, not within a chunk.
+    assert first_pos == {v: LOG.find(v.encode()) for v in first_pos}
+
+
+def test_extract_iocs_keeps_a_trailing_line_without_newline():
+    found, first_pos = iocs.extract_iocs(io.BytesIO(b"a\nlast 8.8.8.8"), chunk_size=4)
+    assert found["IPs"] == ["8.8.8.8"]
+    assert first_pos["8.8.8.8"] == 7
+
+
+@pytest.mark.parametrize("engine", ENGINES, ids=lambda e: e.__name__)
+def test_extract_iocs_finds_ips_and_hashes_inside_urls(engine):
+    sha = "a" * 64
+    log = (
+        b"GET http://185.220.101.1/payload.exe\n"
+        b"see https://www.virustotal.com/gui/file/" + sha.encode() + b"/detection and http://10.1.2.3:8080/x\n"
+    )
+    found, first_pos = iocs.extract_iocs(io.BytesIO(log), 16, iocs.compile_ioc_re(engine))
+    assert found["IPs"] == ["185.220.101.1", "10.1.2.3"]
+    assert found["Hashes"] == [sha]
+    assert found["Domains"] == ["185.220.101.1", "www.virustotal.com", "10.1.2.3:8080"]
+    assert first_pos == {v: log.find(v.encode()) for v in first_pos}
+
+
+@pytest.mark.parametrize("engine", ENGINES, ids=lambda e: e.__name__)
+def test_extract_iocs_handles_long_input_without_newlines(engine):
+    records = [
+        b'{"src":"10.0.%d.%d","url":"http://h%d.example/p","sha":"%s"}' % (i // 250, i % 250, i, b"%032x" % i)
+        for i in range(2000)
+    ]
+    log = b"[" + b",".join(records) + b"]"
+    assert b"\n" not in log
+    whole, whole_pos = iocs.extract_iocs(io.BytesIO(log), len(log) + 1, iocs.compile_ioc_re(engine))
+    chunked, chunked_pos = iocs.extract_iocs(io.BytesIO(log), 1000, iocs.compile_ioc_re(engine))
+    assert chunked == whole and chunked_pos == whole_pos
+    assert len(chunked["IPs"]) == len(chunked["URLs"]) == len(chunked["Hashes"]) == 2000
+
+
+def test_extract_iocs_bounds_the_carry_on_separator_free_runs():
+    log = b"a" * (iocs.MAX_CARRY * 3) + b" 1.2.3.4 " + b"b" * (iocs.MAX_CARRY * 2) + b";a@b.io"
+    found, first_pos = iocs.extract_iocs(io.BytesIO(log), 4096)
+    assert found["IPs"] == ["1.2.3.4"] and found["Emails"] == ["a@b.io"]
+    assert first_pos == {v: log.find(v.encode()) for v in first_pos}